@@ -1,6 +1,7 @@
 """CBRecord package.
 
 Modules:
+    catalog: Keeps a SQLite catalog of the recordings.
     cbr: Manages a run session.
     const: Module for constant variable storage.
     init: Performs initializations.
@@ -0,0 +1,481 @@
+"""Keeps a SQLite catalog of the recordings.
+
+Metadata is collected with FFprobe by a small bounded worker pool, so the
+run session is never blocked by probing. Recordings are catalogued when
+they start and completed when they end. On every startup a backfill
+completes recordings left open by an earlier session and indexes files
+missing from the catalog. It has its own pool so ended recordings are
+never queued behind it.
+
+Classes:
+    - Catalog: Encapsulates the catalog database and the probe pools.
+"""
+
+import json
+import os
+import sqlite3
+import subprocess
+import threading
+
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+from cbrecord import const
+from cbrecord.util import log
+
+# Format of the stored timestamps
+TIME_FORMAT = '%Y-%m-%d %H:%M:%S'
+
+# Extensions of the catalogued recording files
+EXTENSIONS = ('.ts', '.mp4')
+
+# Timeout of an FFprobe run in seconds
+PROBE_TIMEOUT = 60
+
+
+class Catalog:
+    """Encapsulates the catalog database and the probe pools.
+
+    Object variables:
+        - cbr: The run session object (CBRecord class).
+        - ffprobe: Path of FFprobe, None if not available.
+        - db: SQLite connection shared by the workers.
+        - lock: Lock serializing the database access.
+        - closed: Set when the catalog is closed.
+        - pool: Worker pool probing ended recordings.
+        - backfill_pool: Worker pool of the backfill.
+        - backfill_slots: Limit of the backfill jobs in flight.
+        - stale: Recordings left open by an earlier session.
+        - processes: Running FFprobe processes.
+
+    Functions:
+        - __init__: Constructor.
+        - begin: Catalog a started recording.
+        - add: Catalog an ended recording.
+        - remove: Remove a recording from the catalog.
+        - start_backfill: Complete stale and index missing recordings.
+        - hours_per_model: Total recorded hours per model.
+        - recordings: List catalogued recordings.
+        - close: Stop the probes and close the database.
+    """
+    def __init__(self, cbr, ffprobe=None, workers=2):
+        """Constructor.
+
+        Parameters:
+            - cbr (object): The run session object (CBRecord class).
+            - ffprobe=None (string): Path of FFprobe.
+            - workers=2 (int): Number of FFprobe workers, split between
+              ended recordings and the backfill, at least one each.
+        """
+        live_workers = max(1, workers // 2)
+        backfill_workers = max(1, workers - live_workers)
+
+        self.cbr = cbr
+        self.ffprobe = ffprobe
+        self.db = sqlite3.connect(const.CONFIG_DIR + const.CATALOG_FN,
+                                  check_same_thread=False)
+        self.lock = threading.Lock()
+        self.closed = threading.Event()
+        self.pool = ThreadPoolExecutor(max_workers=live_workers)
+        self.backfill_pool = ThreadPoolExecutor(max_workers=backfill_workers)
+        self.backfill_slots = threading.BoundedSemaphore(backfill_workers)
+        self.stale = []
+        self.processes = set()
+
+        with self.lock:
+            self.db.execute("PRAGMA journal_mode=WAL")
+            self.db.executescript(
+                "CREATE TABLE IF NOT EXISTS recordings ("
+                "path TEXT PRIMARY KEY, model TEXT NOT NULL, "
+                "date TEXT NOT NULL, size INTEGER, duration REAL, "
+                "video_codec TEXT, audio_codec TEXT, "
+                "start_time TEXT, end_time TEXT);"
+                "CREATE INDEX IF NOT EXISTS recordings_model_start "
+                "ON recordings (model, start_time);"
+                "CREATE INDEX IF NOT EXISTS recordings_start "
+                "ON recordings (start_time);"
+                "CREATE INDEX IF NOT EXISTS recordings_open "
+                "ON recordings (path) WHERE end_time IS NULL;")
+            self.db.commit()
+            self.stale = [row[0] for row in self.db.execute(
+                "SELECT path FROM recordings WHERE end_time IS NULL")]
+
+    def begin(self, file, model, start):
+        """Catalog a started recording.
+
+        The row has no end time until the recording ends. Errors are
+        logged, recording goes on.
+
+        Parameters:
+            - file (string): Path of the recording.
+            - model (string): Model of the recording.
+            - start (datetime): Start of the broadcast.
+        """
+        path = os.path.normpath(file)
+
+        try:
+            self._write("INSERT OR REPLACE INTO recordings "
+                        "(path, model, date, start_time) "
+                        "VALUES (?, ?, ?, ?)",
+                        (path, model, start.strftime('%Y-%m-%d'),
+                         start.strftime(TIME_FORMAT)))
+        except sqlite3.Error as ex:
+            log("Catalog begin error: ", self.cbr, 30,
+                "{}: {}".format(path, ex))
+
+    def add(self, file, model, start, end):
+        """Catalog an ended recording.
+
+        The row is written immediately, the FFprobe metadata is filled in
+        by the worker pool. Errors are logged, recording goes on.
+
+        Parameters:
+            - file (string): Path of the recording.
+            - model (string): Model of the recording.
+            - start (datetime): Start of the broadcast.
+            - end (datetime): End of the broadcast.
+        """
+        path = os.path.normpath(file)
+
+        try:
+            self._write("INSERT OR REPLACE INTO recordings "
+                        "(path, model, date, size, start_time, end_time) "
+                        "VALUES (?, ?, ?, ?, ?, ?)",
+                        (path, model, start.strftime('%Y-%m-%d'),
+                         os.path.getsize(path), start.strftime(TIME_FORMAT),
+                         end.strftime(TIME_FORMAT)))
+        except (OSError, sqlite3.Error) as ex:
+            log("Catalog add error: ", self.cbr, 30,
+                "{}: {}".format(path, ex))
+            return
+
+        try:
+            self.pool.submit(self._probe_job, path, False)
+        except RuntimeError:
+            pass
+
+    def remove(self, file):
+        """Remove a recording from the catalog.
+
+        Errors are logged, recording goes on.
+
+        Parameters:
+            - file (string): Path of the recording.
+        """
+        path = os.path.normpath(file)
+
+        try:
+            self._write("DELETE FROM recordings WHERE path = ?", (path,))
+        except sqlite3.Error as ex:
+            log("Catalog remove error: ", self.cbr, 30,
+                "{}: {}".format(path, ex))
+
+    def start_backfill(self):
+        """Complete stale and index missing recordings.
+
+        A background thread completes the recordings left open by an
+        earlier session, then walks the recordings directory for files
+        missing from the catalog. It feeds the backfill pool with only a
+        few jobs in flight.
+        """
+        thread = threading.Thread(target=self._walk_job, daemon=True)
+        thread.start()
+
+    def hours_per_model(self, since=None, until=None):
+        """Total recorded hours per model.
+
+        Recordings without a probed duration count with the length of
+        their broadcast, recordings still in progress are not counted.
+
+        Parameters:
+            - since=None (datetime): Only broadcasts started at or after.
+            - until=None (datetime): Only broadcasts started before.
+
+        Returns:
+            - list: (model, hours) tuples, the most recorded first.
+        """
+        where, params = self._time_filter(since, until)
+
+        with self.lock:
+            return self.db.execute(
+                "SELECT model, SUM(COALESCE(duration, "
+                "(julianday(end_time) - julianday(start_time)) * 86400)) "
+                "/ 3600.0 AS hours "
+                "FROM recordings" + where + " GROUP BY model "
+                "ORDER BY hours DESC", params).fetchall()
+
+    def recordings(self, model=None, since=None, until=None):
+        """List catalogued recordings.
+
+        Parameters:
+            - model=None (string): Only recordings of this model.
+            - since=None (datetime): Only broadcasts started at or after.
+            - until=None (datetime): Only broadcasts started before.
+
+        Returns:
+            - list: Row dictionaries ordered by broadcast start, without
+              end time for recordings in progress.
+        """
+        where, params = self._time_filter(since, until)
+        if model is not None:
+            where += " AND model = ?" if where else " WHERE model = ?"
+            params.append(model)
+
+        with self.lock:
+            cursor = self.db.execute("SELECT * FROM recordings" + where +
+                                     " ORDER BY start_time", params)
+            columns = [item[0] for item in cursor.description]
+            return [dict(zip(columns, row)) for row in cursor.fetchall()]
+
+    def close(self):
+        """Stop the probes and close the database.
+
+        Queued jobs are cancelled and running FFprobe processes are
+        killed, so closing does not wait for pending probes.
+        """
+        if self.closed.is_set():
+            return
+
+        with self.lock:
+            self.closed.set()
+            for process in self.processes:
+                process.kill()
+
+        self.pool.shutdown(wait=True, cancel_futures=True)
+        self.backfill_pool.shutdown(wait=True, cancel_futures=True)
+
+        with self.lock:
+            self.db.close()
+
+    def _write(self, sql, params):
+        """Execute and commit a statement unless the catalog is closed.
+
+        Parameters:
+            - sql (string): The SQL statement.
+            - params (tuple): Parameters of the statement.
+        """
+        with self.lock:
+            if self.closed.is_set():
+                return
+            self.db.execute(sql, params)
+            self.db.commit()
+
+    def _walk_job(self):
+        """Complete stale recordings and index missing ones."""
+        for path in self.stale:
+            if not self._feed(self._finish_job, path):
+                return
+
+        try:
+            with self.lock:
+                known = set(row[0] for row in
+                            self.db.execute("SELECT path FROM recordings"))
+        except sqlite3.Error as ex:
+            log("Catalog backfill error: ", self.cbr, 30, ex)
+            return
+
+        count = 0
+        for root, dirs, names in os.walk(const.RECORDINGS_PATH):
+            names = set(names)
+            for name in names:
+                path = os.path.normpath(os.path.join(root, name))
+                if not name.endswith(EXTENSIONS) or path in known:
+                    continue
+                # A failed encode leaves a partial video next to the source
+                if name.endswith('.mp4') and name[:-4] + '.ts' in names:
+                    continue
+
+                if not self._feed(self._probe_job, path, True):
+                    return
+                count += 1
+
+        log("Catalog backfill: ", self.cbr, 20,
+            "{} stale, {} new recordings".format(len(self.stale), count))
+
+    def _feed(self, job, *args):
+        """Submit a backfill job once a slot is free.
+
+        Parameters:
+            - job (function): The job to run.
+            - args: Arguments of the job.
+
+        Returns:
+            - bool: False if the catalog is closed.
+        """
+        while not self.backfill_slots.acquire(timeout=1):
+            if self.closed.is_set():
+                return False
+
+        try:
+            future = self.backfill_pool.submit(job, *args)
+        except RuntimeError:
+            self.backfill_slots.release()
+            return False
+
+        future.add_done_callback(lambda future: self.backfill_slots.release())
+        return True
+
+    def _finish_job(self, path):
+        """Complete a recording left open by an earlier session.
+
+        The end of the broadcast is taken from the modification time.
+        Missing and empty recordings are removed from the catalog.
+
+        Parameters:
+            - path (string): Path of the recording.
+        """
+        try:
+            if not os.path.isfile(path) or os.path.getsize(path) == 0:
+                self._write("DELETE FROM recordings "
+                            "WHERE path = ? AND end_time IS NULL", (path,))
+                return
+
+            meta = self._probe(path)
+            stat = os.stat(path)
+            end = datetime.fromtimestamp(stat.st_mtime)
+
+            self._write("UPDATE recordings SET size = ?, duration = ?, "
+                        "video_codec = ?, audio_codec = ?, end_time = ? "
+                        "WHERE path = ? AND end_time IS NULL",
+                        (stat.st_size, meta['duration'], meta['video_codec'],
+                         meta['audio_codec'], end.strftime(TIME_FORMAT),
+                         path))
+        except (OSError, sqlite3.Error) as ex:
+            log("Catalog error: ", self.cbr, 10, "{}: {}".format(path, ex))
+
+    def _probe_job(self, path, backfill):
+        """Probe a recording and store its metadata.
+
+        Parameters:
+            - path (string): Path of the recording.
+            - backfill (bool): True if the recording is not catalogued yet.
+        """
+        try:
+            meta = self._probe(path)
+
+            if backfill is True:
+                self._insert_backfilled(path, meta)
+            else:
+                self._write("UPDATE recordings SET duration = ?, "
+                            "video_codec = ?, audio_codec = ? "
+                            "WHERE path = ?",
+                            (meta['duration'], meta['video_codec'],
+                             meta['audio_codec'], path))
+        except (OSError, sqlite3.Error) as ex:
+            log("Catalog error: ", self.cbr, 10, "{}: {}".format(path, ex))
+
+    def _insert_backfilled(self, path, meta):
+        """Insert a recording found by the backfill.
+
+        Backfilled recordings have no known broadcast times. They are
+        derived from the modification time and the duration, and moved to
+        the start of the date directory when the derived start is not on
+        that day, as for encoded, copied or restored files.
+
+        Parameters:
+            - path (string): Path of the recording.
+            - meta (dict): FFprobe metadata of the recording.
+        """
+        parts = os.path.relpath(
+            path, os.path.normpath(const.RECORDINGS_PATH)).split(os.sep)
+        if len(parts) != 3:
+            return
+
+        try:
+            day = datetime.strptime(parts[1], '%Y-%m-%d')
+        except ValueError:
+            return
+
+        stat = os.stat(path)
+        if stat.st_size == 0:
+            return
+
+        duration = timedelta(seconds=meta['duration'] or 0)
+        end = datetime.fromtimestamp(stat.st_mtime)
+        start = end - duration
+
+        if start < day or start >= day + timedelta(days=1):
+            start = day
+            end = day + duration
+
+        self._write("INSERT OR IGNORE INTO recordings VALUES "
+                    "(?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    (path, parts[0], parts[1], stat.st_size,
+                     meta['duration'], meta['video_codec'],
+                     meta['audio_codec'], start.strftime(TIME_FORMAT),
+                     end.strftime(TIME_FORMAT)))
+
+    def _probe(self, path):
+        """Run FFprobe on a recording.
+
+        Parameters:
+            - path (string): Path of the recording.
+
+        Returns:
+            - dict: Duration and codecs, None values if unavailable.
+        """
+        meta = {'duration': None, 'video_codec': None, 'audio_codec': None}
+        if self.ffprobe is None:
+            return meta
+
+        cmd = [self.ffprobe, '-v', 'quiet', '-print_format', 'json',
+               '-show_format', '-show_streams', path]
+        process = subprocess.Popen(cmd,
+                                   stdout=subprocess.PIPE,
+                                   stderr=subprocess.DEVNULL)
+
+        with self.lock:
+            self.processes.add(process)
+            if self.closed.is_set():
+                process.kill()
+
+        try:
+            output = process.communicate(timeout=PROBE_TIMEOUT)[0]
+        except subprocess.TimeoutExpired:
+            process.kill()
+            process.communicate()
+            return meta
+        finally:
+            with self.lock:
+                self.processes.discard(process)
+
+        try:
+            info = json.loads(output.decode('utf-8', 'replace'))
+        except ValueError:
+            return meta
+
+        try:
+            meta['duration'] = float(info['format']['duration'])
+        except (KeyError, TypeError, ValueError):
+            pass
+
+        for stream in info.get('streams', []):
+            key = "{}_codec".format(stream.get('codec_type'))
+            if key in meta and meta[key] is None:
+                meta[key] = stream.get('codec_name')
+
+        return meta
+
+    def _time_filter(self, since, until):
+        """Build the broadcast start filter of a query.
+
+        Parameters:
+            - since (datetime): Only broadcasts started at or after.
+            - until (datetime): Only broadcasts started before.
+
+        Returns:
+            - tuple: The WHERE clause and its parameters list.
+        """
+        conditions = []
+        params = []
+
+        if since is not None:
+            conditions.append("start_time >= ?")
+            params.append(since.strftime(TIME_FORMAT))
+        if until is not None:
+            conditions.append("start_time < ?")
+            params.append(until.strftime(TIME_FORMAT))
+
+        if len(conditions) == 0:
+            return "", params
+        return " WHERE " + " AND ".join(conditions), params
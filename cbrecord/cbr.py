@@ -6,11 +6,14 @@ Classes:
 
 import os
 import requests
+import sqlite3
 import subprocess
+import time
 
 from base64 import b64decode
 from datetime import datetime
 
+from cbrecord import catalog
 from cbrecord import const
 from cbrecord import init
 from cbrecord import ws
@@ -26,8 +29,15 @@ class CBRecord:
         - debugLog: The Python logger for debugging.
         - cbr_config: Configuration dictionary.
         - session: Web session object.
+        - tools: Paths and versions of Streamlink, FFmpeg and FFprobe.
+        - catalog: The recordings catalog, None if it can not be opened.
         - tasks: Information holder of Streamlink and FFmpeg tasks.
         - cycle: Counter of the run session cycles.
+        - login_checked: True once the login has been verified.
+        - start_time: Monotonic time of the process creation, including
+          the interpreter startup.
+        - first_record_time: Seconds from start to the first record launch
+          of the first poll.
 
     Functions:
         - __init__: Constructor.
@@ -41,8 +51,16 @@ class CBRecord:
         - record: Start recording.
         - kill_processes: Kill all processes in the tasks list.
     """
-    def __init__(self):
-        """Constructor."""
+    def __init__(self, start_time=None):
+        """Constructor.
+
+        If a saved login cookie is present the warm-up fetch of the homepage
+        is skipped and the first poll doubles as the login check.
+
+        Parameters:
+            - start_time=None (float): Monotonic start time used when the
+              process creation time is unknown.
+        """
         self.runLog = None
         self.debugLog = None
         self.cbr_config = {
@@ -50,11 +68,22 @@ class CBRecord:
             'password': None,
             'crtimer': None,
             'ffmpeg': None,
-            'ffmpeg-flags': None
+            'ffmpeg-flags': None,
+            'catalog-workers': None
         }
         self.session = None
+        self.tools = {}
+        self.catalog = None
         self.tasks = []
         self.cycle = 0
+        self.login_checked = False
+        self.start_time = util.process_start_time()
+        self.first_record_time = None
+
+        if self.start_time is None:
+            self.start_time = start_time
+        if self.start_time is None:
+            self.start_time = time.monotonic()
 
         init.startup_init(self)
         log("Startup initializations OK", self)
@@ -64,8 +93,23 @@ class CBRecord:
         self.session = requests.Session()
         log("HTTP session created", self)
 
-        url = b64decode(b'aHR0cHM6Ly9jaGF0dXJiYXRlLmNvbS8=').decode("utf-8")
-        ws.make_request(url, self, True)
+        if len(ws.load_cookie(self)) > 0:
+            log("Login cookie found, checking login on first poll", self, 10)
+        else:
+            url = b64decode(b'aHR0cHM6Ly9jaGF0dXJiYXRlLmNvbS8=').decode(
+                "utf-8")
+            ws.make_request(url, self, True)
+            self.login_checked = True
+
+        ffprobe = None
+        if 'ffprobe' in self.tools:
+            ffprobe = self.tools['ffprobe']['path']
+        try:
+            self.catalog = catalog.Catalog(self, ffprobe,
+                                           self.cbr_config['catalog-workers'])
+            log("Recordings catalog opened", self)
+        except (OSError, sqlite3.Error) as ex:
+            log("Recordings catalog disabled: ", self, 30, ex)
 
         log("Cycle repeat timer: {} seconds".format(
             self.cbr_config['crtimer']),
@@ -74,7 +118,11 @@ class CBRecord:
         log("Listening to followed models", self, 20)
 
     def do_cycle(self):
-        """Do a cycle."""
+        """Do a cycle.
+
+        The catalog backfill starts after the first cycle, so it does not
+        slow down the first record launches.
+        """
         self.cycle += 1
 
         self.clean_tasks()
@@ -82,6 +130,9 @@ class CBRecord:
         modelList = ws.get_models(self)
         self.process_models(modelList)
 
+        if self.cycle == 1 and self.catalog is not None:
+            self.catalog.start_backfill()
+
     def clean_tasks(self):
         """Clean tasks list, remove ended processes."""
         remove = []
@@ -93,7 +144,7 @@ class CBRecord:
                     self.streamlink_ended(task)
                 elif task['type'] == 'ffmpeg':
                     self.ffmpeg_ended(task)
-            else:
+            elif task['type'] == 'streamlink':
                 if self.cycle % 2 == 0:
                     size = os.path.getsize(task['file'])
                     if size == task['size']:
@@ -117,13 +168,21 @@ class CBRecord:
         """
         log("Record END: ", self, 20, "{}:{}".format(task['id'],
                                                      task['model']))
+        task['end'] = datetime.now()
         if os.path.isfile(task['file']):
             if os.path.getsize(task['file']) > 0:
+                if self.catalog is not None:
+                    self.catalog.add(task['file'], task['model'],
+                                     task['start'], task['end'])
                 if self.cbr_config['ffmpeg'] is True:
                     self.run_ffmpeg(task)
             else:
                 log("Removing 0 size recording: ", self, 10, task['file'])
                 os.remove(task['file'])
+                if self.catalog is not None:
+                    self.catalog.remove(task['file'])
+        elif self.catalog is not None:
+            self.catalog.remove(task['file'])
 
     def run_ffmpeg(self, task):
         """Run FFmpeg to re-encode the video.
@@ -134,9 +193,9 @@ class CBRecord:
         ffmpeg_file = task['file'].replace(".ts", ".mp4")
 
         cmd = [
-            ['ffmpeg', '-nostats', '-loglevel', 'quiet', '-y', '-i',
-             task['file']],
-            self.config['ffmpeg-flags'].split(),
+            [self.tools['ffmpeg']['path'], '-nostats', '-loglevel', 'quiet',
+             '-y', '-i', task['file']],
+            self.cbr_config['ffmpeg-flags'].split(),
             [ffmpeg_file]
         ]
         cmd = [item for sublist in cmd for item in sublist]
@@ -152,7 +211,9 @@ class CBRecord:
             'process': ffmpeg_process,
             'type': 'ffmpeg',
             'file': task['file'],
-            'ffmpeg_file': ffmpeg_file
+            'ffmpeg_file': ffmpeg_file,
+            'start': task['start'],
+            'end': task['end']
         })
 
         log("Encode START: ", self, 20, "{}:{}".format(ffmpeg_process.pid,
@@ -168,6 +229,10 @@ class CBRecord:
             log("Encode END: ", self, 20, "{}:{}".format(task['id'],
                                                          task['model']))
             os.remove(task['file'])
+            if self.catalog is not None:
+                self.catalog.remove(task['file'])
+                self.catalog.add(task['ffmpeg_file'], task['model'],
+                                 task['start'], task['end'])
         else:
             log("Encode ERROR: ", self, 30, "{}:{}".format(task['id'],
                                                            task['model']))
@@ -200,9 +265,10 @@ class CBRecord:
         Parameters:
             - model (string): Model to record.
         """
+        start = datetime.now()
         path = "{}{}/{}/".format(const.RECORDINGS_PATH,
                                  model,
-                                 datetime.now().strftime('%Y-%m-%d'))
+                                 start.strftime('%Y-%m-%d'))
 
         util.create_dir(path)
         i = 1
@@ -212,7 +278,7 @@ class CBRecord:
 
         url = b64decode(b'Y2hhdHVyYmF0ZS5jb20v').decode("utf-8")
         cmd = [
-            'streamlink',
+            self.tools['streamlink']['path'],
             url + model,
             'best',
             '--quiet',
@@ -224,6 +290,7 @@ class CBRecord:
                                    shell=False,
                                    stdout=subprocess.PIPE,
                                    stderr=subprocess.PIPE)
+        launch_time = time.monotonic() - self.start_time
 
         try:
             process.wait(4)
@@ -236,11 +303,23 @@ class CBRecord:
                 'process': process,
                 'type': 'streamlink',
                 'file': file,
-                'size': 0
+                'size': 0,
+                'start': start
             })
 
             log("Record START: ", self, 20, "{}:{}".format(process.pid, model))
 
+            if self.catalog is not None:
+                self.catalog.begin(file, model, start)
+
+            if self.cycle == 1 and self.first_record_time is None:
+                self.first_record_time = launch_time
+                level = 20
+                if launch_time > const.STARTUP_TARGET:
+                    level = 30
+                log("Time to first record launch: ", self, level,
+                    "{:.3f} seconds".format(launch_time))
+
     def kill_processes(self):
         """Kill all process in the tasks list."""
         for task in self.tasks:
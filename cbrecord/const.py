@@ -17,3 +17,22 @@ RECORDINGS_PATH = './Recordings/'
 
 # Cookie filename
 COOKIE_FN = 'cookie.file'
+
+# Recordings catalog filename
+CATALOG_FN = 'catalog.db'
+
+# Tool probe cache filename
+TOOLS_CACHE_FN = 'tools.cache'
+
+# Delay before retrying a failed request in seconds
+RETRY_DELAY = 600
+
+# First retry delay before the first successful poll in seconds, doubled
+# on every attempt up to STARTUP_RETRY_MAX
+STARTUP_RETRY_DELAY = 0.25
+
+# Maximum retry delay before the first successful poll in seconds
+STARTUP_RETRY_MAX = 30
+
+# Target time from process start to the first record launch in seconds
+STARTUP_TARGET = 1.0
@@ -89,7 +89,12 @@ def init_config_loading(cbr):
                     "minimum: 30)\n" +
                     "crtimer=60\n\n" +
                     "[FFmpeg]\nenable=false\n" +
-                    "flags=-c:v libx264 -c:a copy -bsf:a aac_adtstoasc")
+                    "flags=-c:v libx264 -c:a copy -bsf:a aac_adtstoasc\n\n" +
+                    "[Catalog]\n" +
+                    "# FFprobe workers in total, split between ended " +
+                    "recordings and the backfill\n" +
+                    "# (default: 2, minimum: 2, maximum: 16)\n" +
+                    "workers=2")
         print("You need to set your login information.")
         raise SystemExit(0)
 
@@ -114,6 +119,14 @@ def init_config_loading(cbr):
                                                                'flags')
         except configparser.NoSectionError:
             pass
+
+        try:
+            workers = int(config_parser.get('Catalog', 'workers'))
+            if workers < 2 or workers > 16:
+                workers = 2
+            cbr.cbr_config['catalog-workers'] = workers
+        except (ValueError, configparser.NoSectionError):
+            cbr.cbr_config['catalog-workers'] = 2
     except (Exception, configparser.Error):
         if os.path.exists(file):
             os.remove(file)
@@ -2,33 +2,177 @@
 
 Fuctions:
     - check_sl_ffmpeg: Check if Streamlink and FFmpeg is installed.
+    - probe_tool: Find a tool and its version, reusing cached probes.
+    - get_tool_version: Get the version line of a tool.
+    - load_tools_cache: Load the tool probe cache.
+    - save_tools_cache: Save the tool probe cache.
+    - process_start_time: Get the monotonic time of the process creation.
     - create_dir: Create directory with the given path.
     - log: Send message to the logs.
 """
 
+import json
 import os
-import whichcraft
+import subprocess
+import time
+
+from cbrecord import const
 
 
 def check_sl_ffmpeg(cbr):
     """Check if Streamlink and FFmpeg is installed.
 
+    The found paths and versions are stored in the tools dictionary of the
+    run session. Probes are cached and only repeated when the executable
+    or PATH changed. FFprobe is optional, it is only used by the catalog.
+
     Parameters:
         - cbr (object): The run session object (CBRecord class).
     """
-    if whichcraft.which('streamlink') is not None:
-        log("Streamlink OK", cbr)
-    else:
-        log("Streamlink not found", cbr, 40)
-        print("Visit: https://streamlink.github.io/install.html.")
-        raise SystemExit(1)
+    cache = load_tools_cache()
+    cached = dict(cache)
+    tools = [
+        ('streamlink', 'Streamlink', '--version',
+         "https://streamlink.github.io/install.html"),
+        ('ffmpeg', 'FFmpeg', '-version',
+         "https://www.ffmpeg.org/download.html")
+    ]
 
-    if whichcraft.which('ffmpeg') is not None:
-        log("FFmpeg OK", cbr)
+    for name, title, version_flag, install_url in tools:
+        tool = probe_tool(name, version_flag, cache)
+        if tool is not None:
+            cbr.tools[name] = tool
+            log("{} OK: ".format(title), cbr, 20, tool['version'])
+        else:
+            log("{} not found".format(title), cbr, 40)
+            print("Visit: {}.".format(install_url))
+            raise SystemExit(1)
+
+    tool = probe_tool('ffprobe', '-version', cache)
+    if tool is not None:
+        cbr.tools['ffprobe'] = tool
+        log("FFprobe OK: ", cbr, 20, tool['version'])
     else:
-        log("FFmpeg not found", cbr, 40)
-        print("Visit: https://www.ffmpeg.org/download.html.")
-        raise SystemExit(1)
+        log("FFprobe not found, catalog without metadata", cbr, 30)
+
+    if cache != cached:
+        save_tools_cache(cache)
+
+
+def probe_tool(name, version_flag, cache):
+    """Find a tool and its version, reusing cached probes.
+
+    A cached probe is valid while PATH and the modification time of the
+    executable are unchanged.
+
+    Parameters:
+        - name (string): Executable name of the tool.
+        - version_flag (string): Command line flag to print the version.
+        - cache (dict): The tool probe cache, updated in place.
+
+    Returns:
+        - dict: Path, mtime and version of the tool, None if not found.
+    """
+    entry = cache.get(name)
+    if entry is not None:
+        try:
+            if (entry['env_path'] == os.environ.get('PATH', '') and
+                    os.stat(entry['path']).st_mtime == entry['mtime']):
+                return entry
+        except (OSError, KeyError, TypeError):
+            pass
+
+    import whichcraft
+
+    path = whichcraft.which(name)
+    if path is None:
+        cache.pop(name, None)
+        return None
+
+    entry = {
+        'path': path,
+        'mtime': os.stat(path).st_mtime,
+        'version': get_tool_version(path, version_flag),
+        'env_path': os.environ.get('PATH', '')
+    }
+    cache[name] = entry
+    return entry
+
+
+def get_tool_version(path, version_flag):
+    """Get the version line of a tool.
+
+    Parameters:
+        - path (string): Path of the executable.
+        - version_flag (string): Command line flag to print the version.
+
+    Returns:
+        - string: First line of the version output, "unknown" on failure.
+    """
+    try:
+        result = subprocess.run([path, version_flag],
+                                stdout=subprocess.PIPE,
+                                stderr=subprocess.STDOUT,
+                                timeout=10)
+        lines = result.stdout.decode('utf-8', 'replace').splitlines()
+        if len(lines) > 0:
+            return lines[0].strip()
+    except (OSError, subprocess.SubprocessError):
+        pass
+    return "unknown"
+
+
+def load_tools_cache():
+    """Load the tool probe cache.
+
+    Returns:
+        - dict: The tool probe cache, empty if missing or invalid.
+    """
+    file = const.CONFIG_DIR + const.TOOLS_CACHE_FN
+
+    try:
+        with open(file, 'r') as f:
+            cache = json.load(f)
+        if isinstance(cache, dict):
+            return cache
+    except (OSError, ValueError):
+        pass
+    return {}
+
+
+def save_tools_cache(cache):
+    """Save the tool probe cache.
+
+    Parameters:
+        - cache (dict): The tool probe cache.
+    """
+    file = const.CONFIG_DIR + const.TOOLS_CACHE_FN
+
+    try:
+        with open(file, 'w+') as f:
+            json.dump(cache, f)
+    except OSError:
+        pass
+
+
+def process_start_time():
+    """Get the monotonic time of the process creation.
+
+    The creation time is read from /proc, so the interpreter startup is
+    counted too. Its resolution is one clock tick.
+
+    Returns:
+        - float: Monotonic time of the process creation, None if unknown.
+    """
+    try:
+        with open('/proc/self/stat', 'r') as f:
+            fields = f.read().rsplit(')', 1)[1].split()
+        ticks = os.sysconf('SC_CLK_TCK')
+        elapsed = (time.clock_gettime(time.CLOCK_BOOTTIME) -
+                   int(fields[19]) / ticks)
+    except (OSError, ValueError, IndexError, AttributeError):
+        return None
+    return time.monotonic() - elapsed
 
 
 def create_dir(path):
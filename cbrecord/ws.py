@@ -1,7 +1,9 @@
 """Fetches data from the website.
 
 Fuctions:
+    - load_cookie: Load the saved login cookie.
     - make_request: Fetch HTML from the given url.
+    - wait_retry: Wait before retrying a failed request.
     - is_logged_in: Check if the user is logged in to CB.
     - login: Try to log in to CB.
     - get_models: Get a list of online followed models who are free to watch.
@@ -19,6 +21,30 @@ from cbrecord import const
 from cbrecord.util import log
 
 
+def load_cookie(cbr):
+    """Load the saved login cookie.
+
+    Parameters:
+        - cbr (object): The run session object (CBRecord class).
+
+    Returns:
+        - dict: The saved cookie, empty if missing or invalid.
+    """
+    cookie = {}
+
+    try:
+        if os.path.isfile(const.CONFIG_DIR + const.COOKIE_FN):
+            with open(const.CONFIG_DIR + const.COOKIE_FN, 'r') as f:
+                cookie = json.load(f)
+    except json.JSONDecodeError:
+        log("Cookie file error", cbr, 30)
+
+    if not isinstance(cookie, dict):
+        log("Cookie file error", cbr, 30)
+        cookie = {}
+    return cookie
+
+
 def make_request(url, cbr, initial_login=False):
     """Fetch HTML from the given url.
 
@@ -31,15 +57,10 @@ def make_request(url, cbr, initial_login=False):
         - string: The HTML code requested from the given url.
     """
     request = None
-    cookie = {}
     already_logged_in = True
+    attempt = 0
 
-    try:
-        if os.path.isfile(const.CONFIG_DIR + const.COOKIE_FN):
-            with open(const.CONFIG_DIR + const.COOKIE_FN, 'r') as f:
-                cookie = requests.utils.cookiejar_from_dict(json.load(f))
-    except json.JSONDecodeError:
-        log("Cookie file error", cbr, 30)
+    cookie = requests.utils.cookiejar_from_dict(load_cookie(cbr))
 
     while request is None:
         try:
@@ -48,21 +69,21 @@ def make_request(url, cbr, initial_login=False):
         except requests.exceptions.HTTPError as ex:
             log("An HTTP error occured", cbr, 30)
             log("Error message: ", cbr, 10, ex)
-            print("Retrying in 10 minutes.")
             request = None
-            time.sleep(600)
+            attempt += 1
+            wait_retry(cbr, attempt)
         except requests.exceptions.ConnectionError as ex:
             log("No internet connection", cbr, 30)
             log("Error message: ", cbr, 10, ex)
-            print("Retrying in 10 minutes.")
             request = None
-            time.sleep(600)
+            attempt += 1
+            wait_retry(cbr, attempt)
         except requests.exceptions.Timeout as ex:
             log("Connection timeout", cbr, 30)
             log("Error message: ", cbr, 10, ex)
-            print("Retrying in 10 minutes.")
             request = None
-            time.sleep(600)
+            attempt += 1
+            wait_retry(cbr, attempt)
         except requests.exceptions.TooManyRedirects as ex:
             log("Too many redirects", cbr, 40)
             log("Error message: ", cbr, 10, ex)
@@ -82,6 +103,26 @@ def make_request(url, cbr, initial_login=False):
     return request.text
 
 
+def wait_retry(cbr, attempt):
+    """Wait before retrying a failed request.
+
+    Until the first poll succeeded the delay starts short and doubles on
+    every attempt, afterwards the regular delay is used.
+
+    Parameters:
+        - cbr (object): The run session object (CBRecord class).
+        - attempt (int): Number of the failed attempts.
+    """
+    if cbr.cycle <= 1:
+        delay = min(const.STARTUP_RETRY_DELAY * 2 ** (attempt - 1),
+                    const.STARTUP_RETRY_MAX)
+    else:
+        delay = const.RETRY_DELAY
+
+    print("Retrying in {:g} seconds.".format(delay))
+    time.sleep(delay)
+
+
 def is_logged_in(html):
     """Check if the user is logged in to CB.
 
@@ -148,7 +189,8 @@ def get_models(cbr):
     """
     url = b64decode(b'aHR0cHM6Ly9jaGF0dXJiYXR' +
                     b'lLmNvbS9mb2xsb3dlZC1jYW1zLw==').decode("utf-8")
-    html = make_request(url, cbr)
+    html = make_request(url, cbr, not cbr.login_checked)
+    cbr.login_checked = True
     models = []
 
     try:
@@ -8,6 +8,9 @@
 
 import time
 
+# Fallback start time when the process creation time is unknown
+START_TIME = time.monotonic()
+
 
 def main():
     """Entry point."""
@@ -21,7 +24,7 @@ def main():
     try:
         from cbrecord import cbr
 
-        cbr = cbr.CBRecord()
+        cbr = cbr.CBRecord(START_TIME)
         while True:
             cbr.do_cycle()
             time.sleep(cbr.cbr_config['crtimer'])
@@ -40,6 +43,12 @@ def main():
         print("An unexpected error occured.")
         print("Error message: " + str(ex))
         raise SystemExit(1)
+    finally:
+        try:
+            if cbr.catalog is not None:
+                cbr.catalog.close()
+        except AttributeError:
+            pass
 
 
 if __name__ == "__main__":